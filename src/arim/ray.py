@@ -3,13 +3,14 @@ Ray tracing module
 
 """
 import contextlib
-import gc
 import logging
 import math
 import os
+import threading
 import time
 import warnings
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 import numba
 import numpy as np
@@ -22,6 +23,16 @@ from .helpers import Cache, NoCache, chunk_array
 use_parallel = os.environ.get("ARIM_USE_PARALLEL", not numba.core.config.IS_32BITS)
 
 
+def smallest_uint_that_fits(max_value):
+    """
+    Return the smallest unsigned integer dtype which can store ``max_value``.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"no unsigned integer dtype is large enough for {max_value}")
+
+
 def find_minimum_times(
     time_1, time_2, dtype=None, dtype_indices=None, block_size=None, numthreads=None
 ):
@@ -76,8 +87,15 @@ def find_minimum_times(
     if numthreads is None:
         numthreads = s.NUMTHREADS
 
+    dtype_indices = np.dtype(dtype_indices)
+    if dtype_indices.kind == "u":
+        # -1 is not representable; use the maximum value as 'no index yet'.
+        invalid_index = np.iinfo(dtype_indices).max
+    else:
+        invalid_index = -1
+
     out_min_times = np.full((n, p), np.inf, dtype=dtype)
-    out_best_indices = np.full((n, p), -1, dtype=dtype_indices)
+    out_best_indices = np.full((n, p), invalid_index, dtype=dtype_indices)
 
     # time_1 will be scanned row per row, time_2 column per column.
     # Force to use the most efficient order (~20 times speed-up between the best and worst case).
@@ -198,8 +216,8 @@ def ray_tracing(views_list, convert_to_fortran_order=False):
     )
 
 
-@numba.jit(nopython=True, nogil=True, parallel=use_parallel)
-def _expand_rays(interior_indices, indices_new_interface, expanded_indices):
+@numba.jit(nopython=True, nogil=True, parallel=use_parallel, cache=True)
+def _expand_rays(interior_indices_t, indices_new_interface, expanded_indices):
     """
     Expand the rays by one interface knowing the beginning of the rays and the
     points the rays must go through at the last interface.
@@ -210,14 +228,16 @@ def _expand_rays(interior_indices, indices_new_interface, expanded_indices):
     m: number of points of interface Ad
     p: number of points of interface A(d+1)
 
-    Arrays layout must be contiguous.
+    Arrays layout must be contiguous. The interior indices are passed
+    transposed as (n, m, d) so that copying the head of a ray reads d
+    consecutive elements instead of d elements strided by n*m.
 
     Output: out_ray
 
     Parameters
     ----------
-    interior_indices: *interior* indices of rays going from A(0) to A(d).
-        Shape: (d, n, m)
+    interior_indices_t: *interior* indices of rays going from A(0) to A(d).
+        Shape: (n, m, d)
     indices_new_interface: indices of the points of interface A(d) that the rays
     starting from A(0) cross to go to A(d+1).
         Shape: (n, p)
@@ -225,7 +245,7 @@ def _expand_rays(interior_indices, indices_new_interface, expanded_indices):
         Shape (d+1, n, p)
 
     """
-    d, n, m = interior_indices.shape
+    n, m, d = interior_indices_t.shape
     _, p = indices_new_interface.shape
 
     for i in numba.prange(n):
@@ -235,7 +255,7 @@ def _expand_rays(interior_indices, indices_new_interface, expanded_indices):
 
             # copy the head of ray
             for k in range(d):
-                expanded_indices[k, i, j] = interior_indices[k, i, idx]
+                expanded_indices[k, i, j] = interior_indices_t[i, idx, k]
 
             # add the last point
             expanded_indices[d, i, j] = idx
@@ -288,7 +308,14 @@ class Rays:
         for all i and j.
     """
 
-    # __slots__ = []
+    __slots__ = (
+        "_times",
+        "_indices",
+        "_interior_indices",
+        "_order",
+        "_fermat_path",
+        "_extreme_lens",
+    )
 
     def __init__(self, times, interior_indices, fermat_path, order=None):
         assert times.ndim == 2
@@ -300,14 +327,15 @@ class Rays:
         )
         assert fermat_path.num_points_sets == interior_indices.shape[0] + 2
 
-        assert interior_indices.dtype.kind == "i"
+        assert interior_indices.dtype.kind in "iu"
         assert times.dtype.kind == "f"
 
-        indices = self.make_indices(interior_indices, order=order)
-
         self._times = times
-        self._indices = indices
+        self._interior_indices = interior_indices
+        self._indices = None  # materialised on demand in the 'indices' property
+        self._order = order
         self._fermat_path = fermat_path
+        self._extreme_lens = None  # lazy, see gone_through_extreme_points
 
     @classmethod
     def make_rays_two_interfaces(cls, times, path, dtype_indices):
@@ -335,11 +363,17 @@ class Rays:
 
     @property
     def indices(self):
+        # The full (d, n, m) array is mostly bookkeeping: its first and last
+        # planes are arange vectors broadcast over (n, m). Materialise it only
+        # when actually requested; the solver internals use 'interior_indices'
+        # and 'times' only, so intermediate Rays objects never pay for it.
+        if self._indices is None:
+            self._indices = self.make_indices(self._interior_indices, order=self._order)
         return self._indices
 
     @property
     def interior_indices(self):
-        return self.indices[1:-1, ...]
+        return self._interior_indices
 
     @staticmethod
     def make_indices(interior_indices, order=None):
@@ -368,10 +402,12 @@ class Rays:
             else:
                 order = "C"
 
-        indices = np.zeros((dm2 + 2, n, m), dtype=interior_indices.dtype, order=order)
+        indices = np.empty((dm2 + 2, n, m), dtype=interior_indices.dtype, order=order)
 
-        indices[0, ...] = np.repeat(np.arange(n), m).reshape((n, m))
-        indices[-1, ...] = np.tile(np.arange(m), n).reshape((n, m))
+        # Broadcast assignment: avoid materialising full (n, m) arrays of row/column
+        # indices via np.repeat/np.tile.
+        indices[0, ...] = np.arange(n, dtype=interior_indices.dtype)[:, np.newaxis]
+        indices[-1, ...] = np.arange(m, dtype=interior_indices.dtype)[np.newaxis, :]
         indices[1:-1, ...] = interior_indices
         return indices
 
@@ -397,9 +433,12 @@ class Rays:
         """
         points = self.fermat_path.points[n_interface]
         indices = self.indices[n_interface, ...]
-        x = points.x[indices]
-        y = points.y[indices]
-        z = points.z[indices]
+        # Gather the (x, y, z) coordinates in one pass instead of three
+        # fancy-indexed gathers over the same indices.
+        coords = _take_along_first_axis(points.coords, indices)
+        x = coords[..., 0]
+        y = coords[..., 1]
+        z = coords[..., 2]
         yield (x, y, z)
 
     def get_coordinates_one(self, start_index, end_index):
@@ -410,15 +449,14 @@ class Rays:
         a larger number of rays.
         """
         indices = self.indices[:, start_index, end_index]
-        num_points_sets = self.fermat_path.num_points_sets
-        x = np.zeros(num_points_sets, s.FLOAT)
-        y = np.zeros(num_points_sets, s.FLOAT)
-        z = np.zeros(num_points_sets, s.FLOAT)
-        for i, (points, j) in enumerate(zip(self.fermat_path.points, indices)):
-            x[i] = points.x[j]
-            y[i] = points.y[j]
-            z[i] = points.z[j]
-        return g.Points.from_xyz(x, y, z, "Ray")
+        # One (3,) row gather per interface instead of nine scalar lookups.
+        # The interfaces have different numbers of points so their coords
+        # cannot be stacked once for a single global gather.
+        coords = np.array(
+            [points.coords[j] for points, j in zip(self.fermat_path.points, indices)],
+            dtype=s.FLOAT,
+        )
+        return g.Points(coords, "Ray")
 
     def gone_through_extreme_points(self):
         """
@@ -437,17 +475,33 @@ class Rays:
             Order: same as attribute ``indices``.
 
         """
-        order = "F" if self.indices.flags.f_contiguous else "C"
-
-        shape = self.indices.shape[1:]
-        out = np.zeros(shape, order=order, dtype=bool)
-
         interior_indices = self.interior_indices
-        middle_points = tuple(self.fermat_path.points)[1:-1]
-        for d, points in enumerate(middle_points):
-            np.logical_or(out, interior_indices[d, ...] == 0, out=out)
-            np.logical_or(out, interior_indices[d, ...] == (len(points) - 1), out=out)
-        return out
+        if interior_indices.flags.c_contiguous:
+            order = "C"
+        elif interior_indices.flags.f_contiguous:
+            order = "F"
+        else:
+            order = "C"
+
+        middle_points = self.fermat_path.points[1:-1]
+        if len(middle_points) == 0:
+            return np.zeros(self.times.shape, order=order, dtype=bool)
+
+        # Check both extreme points of every interior interface in a single
+        # broadcast comparison instead of four logical_or sweeps per interface.
+        # The last indices of the interior interfaces are constant for the
+        # lifetime of the object: compute them once and reuse on later calls.
+        if self._extreme_lens is None:
+            self._extreme_lens = np.array(
+                [len(points) - 1 for points in middle_points],
+                dtype=interior_indices.dtype,
+            )
+        last_indices = self._extreme_lens
+        out = (
+            (interior_indices == 0)
+            | (interior_indices == last_indices[:, np.newaxis, np.newaxis])
+        ).any(axis=0)
+        return np.asarray(out, order=order)
 
     def to_fortran_order(self):
         """
@@ -471,7 +525,7 @@ class Rays:
         )
 
     @staticmethod
-    def expand_rays(interior_indices, indices_new_interface):
+    def expand_rays(interior_indices, indices_new_interface, out=None):
         """
         Expand the rays by one interface knowing the beginning of the rays and the
         points the rays must go through at the last interface.
@@ -491,6 +545,11 @@ class Rays:
         indices_new_interface: indices of the points of interface A(d) that the rays
         starting from A(0) cross to go to A(d+1).
             Shape: (n, p)
+        out : ndarray or None
+            Preallocated C-contiguous output of shape (d+1, n, p) and same
+            dtype as ``interior_indices``. Default: allocate on the fly.
+            Caution: the returned array may be kept alive by a Rays object;
+            reuse a buffer only if the previous result is no longer needed.
 
         Returns
         -------
@@ -503,11 +562,27 @@ class Rays:
             raise ValueError("Inconsistent shapes")
         if d == 0:
             new_shape = (1, *indices_new_interface.shape)
-            return indices_new_interface.reshape(new_shape)
+            if out is None:
+                return indices_new_interface.reshape(new_shape)
+            np.copyto(out, indices_new_interface.reshape(new_shape))
+            return out
         else:
-            expanded_indices = np.empty((d + 1, n, p), dtype=interior_indices.dtype)
-            _expand_rays(interior_indices, indices_new_interface, expanded_indices)
-            return expanded_indices
+            # The kernel assumes contiguous layouts (see its docstring). The
+            # interior indices are transposed so that the head of each ray is
+            # a contiguous d-element row for the gather.
+            interior_indices_t = np.ascontiguousarray(
+                interior_indices.transpose(1, 2, 0)
+            )
+            indices_new_interface = np.ascontiguousarray(indices_new_interface)
+            if out is None:
+                out = np.empty((d + 1, n, p), dtype=interior_indices.dtype)
+            else:
+                if out.shape != (d + 1, n, p):
+                    raise ValueError("Inconsistent shapes")
+                if out.dtype != interior_indices.dtype:
+                    raise ValueError("Inconsistent dtypes")
+            _expand_rays(interior_indices_t, indices_new_interface, out)
+            return out
 
     def reverse(self, order="f"):
         """
@@ -535,7 +610,8 @@ class Rays:
         return self.__class__(reversed_times, reversed_indices, reversed_path)
 
 
-class FermatPath(tuple):
+@dataclass(frozen=True, init=False, eq=False)
+class FermatPath:
     """
     FermatPath(points_and_speeds)
 
@@ -549,89 +625,147 @@ class FermatPath(tuple):
 
     Ex: FermatPath((points_1, speed_1_2, points_2, speed_2_3, points_3))
 
+    The points and the velocities are stored in two separate tuples so that the
+    accessors used in the solver hot loops are plain attribute reads instead of
+    walks over an interleaved sequence. Comparison against an interleaved tuple
+    is still supported.
+
     """
 
-    def __new__(cls, sequence):
+    points: tuple
+    velocities: tuple
+
+    def __init__(self, sequence):
+        sequence = tuple(sequence)
         if len(sequence) % 2 == 0 or len(sequence) < 3:
             raise ValueError(
-                f"{cls.__name__} expects a sequence of length odd and >= 5)"
+                f"{self.__class__.__name__} expects a sequence of length odd and >= 5)"
             )
         assert all(np.isfinite(sequence[1::2])), "nonfinite velocity"
-        return super().__new__(cls, sequence)
+        object.__setattr__(self, "points", sequence[0::2])
+        object.__setattr__(self, "velocities", sequence[1::2])
+
+    @classmethod
+    def from_parts(cls, points, velocities):
+        """
+        Create a FermatPath from a tuple of Points and a tuple of velocities
+        (alternative constructor, no interleaving).
+        """
+        obj = object.__new__(cls)
+        object.__setattr__(obj, "points", tuple(points))
+        object.__setattr__(obj, "velocities", tuple(velocities))
+        return obj
 
     @classmethod
     def from_path(cls, path):
         """
         Create a FermatPath object from a (smarter) Path object.
         """
-        path_pieces = []
-        for interface, material, mode in zip(
-            path.interfaces, path.materials, path.modes
-        ):
-            velocity = material.velocity(mode)
-            path_pieces.append(interface.points)
-            path_pieces.append(velocity)
-        path_pieces.append(path.interfaces[-1].points)
-        return cls(path_pieces)
+        points = tuple(interface.points for interface in path.interfaces)
+        velocities = tuple(
+            material.velocity(mode)
+            for material, mode in zip(path.materials, path.modes)
+        )
+        assert len(points) == len(velocities) + 1
+        return cls.from_parts(points, velocities)
+
+    def interleaved(self):
+        """
+        Returns the path as the interleaved tuple
+        ``(points_1, speed_1_2, points_2, ...)``.
+        """
+        out = [None] * (len(self.points) + len(self.velocities))
+        out[0::2] = self.points
+        out[1::2] = self.velocities
+        return tuple(out)
 
     def __repr__(self):
         return "{}({})".format(
-            self.__class__.__name__, ", ".join([str(x) for x in self])
+            self.__class__.__name__, ", ".join([str(x) for x in self.interleaved()])
         )
 
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, FermatPath):
+            # Fast rejection on the cached hashes; compare the contents only
+            # when the hashes collide.
+            if hash(self) != hash(other):
+                return False
+            return self.points == other.points and self.velocities == other.velocities
+        elif isinstance(other, tuple):
+            # Compatibility with the interleaved representation:
+            return self.interleaved() == other
+        else:
+            return NotImplemented
+
+    def __hash__(self):
+        # Computed once per object: FermatPath objects are used as dict keys
+        # throughout the solver and hashing walks both tuples.
+        try:
+            return self._hash
+        except AttributeError:
+            h = hash((self.points, self.velocities))
+            object.__setattr__(self, "_hash", h)
+            return h
+
     def __add__(self, tail):
-        if self[-1] != tail[0]:
+        if self.points[-1] != tail.points[0]:
             raise ValueError("Cannot join two subpaths with different extremities.")
-        return self.__class__((*self, *tail[1:]))
+        return self.__class__.from_parts(
+            self.points + tail.points[1:], self.velocities + tail.velocities
+        )
 
     def reverse(self):
-        return self.__class__(tuple(reversed(self)))
+        return self.__class__.from_parts(self.points[::-1], self.velocities[::-1])
 
     def split_head(self):
         """
         Split a Path in two at the first interface:
         ``(points_1, speed_1_2, points_2)`` and ``(points_2, speed_2_3, ..., points_n)``.
+
+        The result is cached on the instance (not in a class-level cache,
+        which would keep every split path and its Points alive for the life
+        of the process), so repeated calls return the same subpath objects
+        and their id() is stable during a solver run.
         """
-        if len(self) < 5:
-            raise ValueError("Not enough elements to split (min: 5)")
-        head = self.__class__(self[:3])
-        tail = self.__class__(self[2:])
-        return head, tail
+        try:
+            return self._split_head
+        except AttributeError:
+            if self.num_points_sets < 3:
+                raise ValueError("Not enough elements to split (min: 5)")
+            head = self.__class__.from_parts(self.points[:2], self.velocities[:1])
+            tail = self.__class__.from_parts(self.points[1:], self.velocities[1:])
+            object.__setattr__(self, "_split_head", (head, tail))
+            return self._split_head
 
     def split_queue(self):
         """
         Split a Path in two at the last interface:
         ``(points_1, speed_1_2, ... points_n1)`` and ``(points_n1, speed, points_n)``.
-        """
-
-        if len(self) < 5:
-            raise ValueError("Not enough elements to split (min: 5)")
-        head = self.__class__(self[:-2])
-        tail = self.__class__(self[-3:])
-        return head, tail
 
-    @property
-    def points(self):
-        """
-        Returns all the Points objects in Path as a tuple.
+        The result is cached on the instance; see :meth:`split_head`.
         """
-        return tuple(self[0::2])
-
-    @property
-    def velocities(self):
-        return tuple(self[1::2])
+        try:
+            return self._split_queue
+        except AttributeError:
+            if self.num_points_sets < 3:
+                raise ValueError("Not enough elements to split (min: 5)")
+            head = self.__class__.from_parts(self.points[:-1], self.velocities[:-1])
+            tail = self.__class__.from_parts(self.points[-2:], self.velocities[-1:])
+            object.__setattr__(self, "_split_queue", (head, tail))
+            return self._split_queue
 
     @property
     def num_points_sets(self):
-        return len(self) // 2 + 1
+        return len(self.points)
 
     @property
     def len_largest_interface(self):
         """
         Excluse first and last dataset
         """
-        all_points = tuple(self.points)
-        interfaces = all_points[1:-1]
+        interfaces = self.points[1:-1]
         if not interfaces:
             return 0
         else:
@@ -679,7 +813,14 @@ class FermatSolver:
             dtype = s.FLOAT
 
         if dtype_indices is None:
-            dtype_indices = s.INT
+            # Smallest unsigned dtype able to index every interface of every
+            # path. The first and last interfaces count too because the full
+            # 'Rays.indices' arrays share this dtype.
+            max_length = max(
+                (len(points) for path in fermat_paths_set for points in path.points),
+                default=0,
+            )
+            dtype_indices = smallest_uint_that_fits(max_length - 1)
 
         for path in fermat_paths_set:
             try:
@@ -693,6 +834,9 @@ class FermatSolver:
         self.res = {}
         self.paths = fermat_paths_set
 
+        # Guards the caches when several paths are solved concurrently.
+        self._cache_lock = threading.Lock()
+
         self.num_minimization = 0
         self.num_euc_distance = 0
 
@@ -730,14 +874,125 @@ class FermatSolver:
     def solve_no_clean(self):
         """
         Compute the rays for all paths and store them in ``self.res``.
+
+        The paths are decomposed into their unique subpaths and evaluated
+        bottom-up, level by level: all subpaths of a given size only depend
+        on smaller ones, so the subpaths within one level are independent and
+        are evaluated concurrently. Subpaths shared by several paths (same
+        interfaces and velocities) are evaluated once.
         """
         tic = time.perf_counter()
+        self._precompute_distances()
+        deps, levels = self._build_subpath_dag()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=s.NUMTHREADS) as executor:
+            for num_points_sets in sorted(levels):
+                nodes = levels[num_points_sets]
+
+                def evaluate(path):
+                    children = deps[path]
+                    if children is None:
+                        return self.consecutive_times(path)
+                    head, tail = children
+                    return self._merge(results[head], results[tail], path)
+
+                if len(nodes) == 1:
+                    results[nodes[0]] = evaluate(nodes[0])
+                else:
+                    # Most of the work happens in find_minimum_times, which
+                    # releases the GIL.
+                    for path, rays in zip(nodes, executor.map(evaluate, nodes)):
+                        results[path] = rays
+
+        for path, rays in results.items():
+            if path.num_points_sets > 2 and path not in self.cached_result:
+                self.cached_result[path] = rays
         for path in self.paths:
-            self.res[path] = self._solve(path)
+            self.res[path] = results[path]
         toc = time.perf_counter()
         logger.info(f"Ray tracing: solved all in {toc - tic:.3g}s")
         return self.res
 
+    def _build_subpath_dag(self):
+        """
+        Decompose all paths of the solver into their unique subpaths.
+
+        The requested paths are registered first so that, when a requested
+        path also shows up as a subpath of another one, the canonical node is
+        the requested object itself.
+
+        Returns
+        -------
+        deps : dict
+            Maps each unique subpath to its (head, tail) subpath pair, or to
+            None for consecutive-pair base cases.
+        levels : dict
+            Maps a number of points sets to the list of unique subpaths of
+            that size.
+
+        """
+        deps = {}
+        levels = {}
+        stack = []
+
+        def register(path):
+            if path in deps:
+                return
+            if path.num_points_sets == 2:
+                deps[path] = None
+            else:
+                head, tail = path.split_queue()
+                deps[path] = (head, tail)
+                stack.append(head)
+                stack.append(tail)
+            levels.setdefault(path.num_points_sets, []).append(path)
+
+        for path in self.paths:
+            register(path)
+        while stack:
+            register(stack.pop())
+        return deps, levels
+
+    def _precompute_distances(self):
+        """
+        Compute the distance matrices of all distinct pairs of consecutive
+        interfaces across the paths and store them in ``cached_distance``.
+
+        These computations are independent of each other, so hoisting them
+        out of the recursion lets them run concurrently instead of serially
+        on first use inside ``_solve``.
+        """
+        pairs = []
+        for path in self.paths:
+            points = path.points
+            for key in zip(points, points[1:]):
+                rkey = (key[1], key[0])
+                if (
+                    key not in self.cached_distance
+                    and key not in pairs
+                    and rkey not in self.cached_distance
+                    and rkey not in pairs
+                ):
+                    pairs.append(key)
+        if not pairs:
+            return
+
+        def compute(key):
+            return g.distance_pairwise(key[0], key[1], dtype=self.dtype)
+
+        numworkers = min(len(pairs), s.NUMTHREADS)
+        with ThreadPoolExecutor(max_workers=numworkers) as executor:
+            distances = list(executor.map(compute, pairs))
+        with self._cache_lock:
+            for key, distance in zip(pairs, distances):
+                self.num_euc_distance += 1
+                self.cached_distance[key] = distance
+                rkey = (key[1], key[0])
+                if rkey != key and rkey not in self.cached_distance:
+                    # The reverse direction is a free transposed view.
+                    self.cached_distance[rkey] = distance.T
+
     def _solve(self, path):
         """
         Returns the rays starting from the first interface and last interface of ``path``.
@@ -755,24 +1010,66 @@ class FermatSolver:
         res : Rays
 
         """
-        if path in self.cached_result:
-            # Cache hits, hourray
-            return self.cached_result[path]
+        # Identity-keyed memo first: no hashing of the path at all. The memo
+        # stores the path alongside the result so the id cannot be recycled.
+        memoised = self._memo.get(id(path))
+        if memoised is not None:
+            return memoised[1]
+
+        with self._cache_lock:
+            if path in self.cached_result:
+                # Cache hits, hourray
+                res = self.cached_result[path]
+                self._memo[id(path)] = (path, res)
+                return res
 
         # Special case if we have only two (consecutive) boundaries:
-        if len(path) == 3:
+        if path.num_points_sets == 2:
             return self.consecutive_times(path)
 
-        # General case: compute by calling _solve() recursively:
         head, tail = path.split_queue()
 
-        res_head = self._solve(head)
-        res_tail = self._solve(tail)
-        assert isinstance(res_head, Rays)
-        assert isinstance(res_tail, Rays)
+        if path.num_points_sets == 3:
+            # Common shape (e.g. probe -> frontwall -> grid): both subpaths
+            # are consecutive pairs, so go straight to the base case instead
+            # of two recursive calls and their cache probes.
+            res_head = self.consecutive_times(head)
+            res_tail = self.consecutive_times(tail)
+        else:
+            # General case: compute by calling _solve() recursively:
+            res_head = self._solve(head)
+            res_tail = self._solve(tail)
+            assert isinstance(res_head, Rays)
+            assert isinstance(res_tail, Rays)
+
+        res = self._merge(res_head, res_tail, path)
+        with self._cache_lock:
+            if path in self.cached_result:
+                # Another thread raced us on this subpath; keep its result.
+                res = self.cached_result[path]
+            else:
+                self.cached_result[path] = res
+        self._memo[id(path)] = (path, res)
+        return res
+
+    def _merge(self, res_head, res_tail, path):
+        """
+        Merge the rays of a head subpath and a consecutive-pair tail subpath
+        into the rays of ``path``.
+
+        Returns
+        -------
+        res : Rays
+
+        """
+        assert res_tail.fermat_path.num_points_sets == 2
 
-        self.num_minimization += 1
-        logger.debug(f"Ray tracing: solve for subpaths {str(head)} and {str(tail)}")
+        with self._cache_lock:
+            self.num_minimization += 1
+        logger.debug(
+            f"Ray tracing: merge subpaths {str(res_head.fermat_path)} "
+            f"and {str(res_tail.fermat_path)}"
+        )
         times, indices_at_interface = find_minimum_times(
             res_head.times,
             res_tail.times,
@@ -780,19 +1077,21 @@ class FermatSolver:
             dtype_indices=self.dtype_indices,
         )
 
-        assert res_tail.fermat_path.num_points_sets == 2
         indices = Rays.expand_rays(res_head.interior_indices, indices_at_interface)
 
         del indices_at_interface  # no more useful
 
-        res = Rays(times, indices, path)
-        self.cached_result[path] = res
-        return res
+        return Rays(times, indices, path)
 
     def clear_cache(self):
+        # Dropping the caches is enough: they only hold Rays objects and
+        # ndarrays, which are freed by reference counting. A forced
+        # gc.collect() here walked the whole heap for nothing.
         self.cached_distance = Cache()
         self.cached_result = Cache()
-        gc.collect()  # force the garbage collector to delete unreferenced objects
+        # Identity-keyed (id(path) -> (path, Rays)) shortcut over
+        # cached_result, avoiding path hashing inside the recursion.
+        self._memo = {}
 
     def consecutive_times(self, path):
         """Computes the rays between two consecutive sets of points.
@@ -804,19 +1103,29 @@ class FermatSolver:
 
         Returns a ``Rays`` object.
         """
-        points1, speed, points2 = path
+        points1, points2 = path.points
+        speed = path.velocities[0]
 
         key = (points1, points2)
 
-        try:
-            distance = self.cached_distance[key]
-        except KeyError:
-            self.num_euc_distance += 1
+        with self._cache_lock:
+            try:
+                distance = self.cached_distance[key]
+            except KeyError:
+                distance = None
+        if distance is None:
             distance = g.distance_pairwise(points1, points2, dtype=self.dtype)
-            rkey = (points1, points2)
-            self.cached_distance[key] = distance
-            if key != rkey:  # if points1 and points2 are the same!
-                self.cached_distance[rkey] = distance.T
+            rkey = (points2, points1)
+            with self._cache_lock:
+                if key in self.cached_distance:
+                    # Another thread raced us on this distance; keep its result.
+                    distance = self.cached_distance[key]
+                else:
+                    self.num_euc_distance += 1
+                    self.cached_distance[key] = distance
+                    if rkey != key and rkey not in self.cached_distance:
+                        # The reverse direction is a free transposed view.
+                        self.cached_distance[rkey] = distance.T
         return Rays.make_rays_two_interfaces(distance / speed, path, self.dtype_indices)
 
 
@@ -833,6 +1142,48 @@ def _signed_leg_angle(polar, azimuth):
         return -polar
 
 
+@numba.jit(nopython=True, nogil=True, parallel=use_parallel, cache=True)
+def _legs_local_coordinates(legs_starts, legs_ends, orientations, out):
+    """
+    Fused kernel for ``from_gcs(legs_starts, orientations, legs_ends)``:
+    for each leg, subtract the origin and apply the orientation matrix in
+    registers instead of materialising the (n, m, 3) difference array
+    between two full passes.
+
+    Parameters
+    ----------
+    legs_starts, legs_ends
+        Shape: (n, m, 3)
+    orientations
+        Shape: (n, m, 3, 3)
+    out : OUTPUT
+        Shape: (n, m, 3)
+
+    """
+    n, m = legs_starts.shape[:2]
+    for i in numba.prange(n):
+        for j in range(m):
+            dx = legs_starts[i, j, 0] - legs_ends[i, j, 0]
+            dy = legs_starts[i, j, 1] - legs_ends[i, j, 1]
+            dz = legs_starts[i, j, 2] - legs_ends[i, j, 2]
+            for k in range(3):
+                out[i, j, k] = (
+                    orientations[i, j, k, 0] * dx
+                    + orientations[i, j, k, 1] * dy
+                    + orientations[i, j, k, 2] * dz
+                )
+
+
+def _take_along_first_axis(arr, indices):
+    """
+    Equivalent to ``arr.take(indices, axis=0)`` but flattens the index array
+    first: a take with a 1d index array is noticeably faster than one with a
+    multidimensional index array.
+    """
+    out = arr.take(indices.ravel(), axis=0)
+    return out.reshape(indices.shape + arr.shape[1:])
+
+
 def _to_readonly(x):
     if isinstance(x, np.ndarray):
         x.flags.writeable = False
@@ -1016,7 +1367,9 @@ class RayGeometry:
         """
         interfaces = self.interfaces
         points = interfaces[interface_idx].points
-        legs_points = points.coords.take(self.rays.indices[interface_idx], axis=0)
+        legs_points = _take_along_first_axis(
+            points.coords, self.rays.indices[interface_idx]
+        )
         return g.aspoints(legs_points)
 
     @_cache_ray_geometry
@@ -1037,7 +1390,9 @@ class RayGeometry:
         """
         orientations_all_points = self.interfaces[interface_idx].orientations
         rays_indices = self.rays.indices[interface_idx]
-        orientations = orientations_all_points.coords.take(rays_indices, axis=0)
+        orientations = _take_along_first_axis(
+            orientations_all_points.coords, rays_indices
+        )
         return g.aspoints(orientations)
 
     def clear_intermediate_results(self):
@@ -1114,7 +1469,8 @@ class RayGeometry:
             interface_idx, is_final=False
         ).coords
 
-        legs_local = g.from_gcs(legs_starts, orientations, legs_ends)
+        legs_local = np.empty(legs_starts.shape, dtype=legs_starts.dtype)
+        _legs_local_coordinates(legs_starts, legs_ends, orientations, legs_local)
         return g.aspoints(legs_local)
 
     @_cache_ray_geometry
@@ -1249,7 +1605,8 @@ class RayGeometry:
             interface_idx, is_final=False
         ).coords
         # Convert legs in the local coordinate systems.
-        legs_local = g.from_gcs(legs_ends, orientations, legs_starts)
+        legs_local = np.empty(legs_ends.shape, dtype=legs_ends.dtype)
+        _legs_local_coordinates(legs_ends, legs_starts, orientations, legs_local)
         return g.aspoints(legs_local)
 
     @_cache_ray_geometry
@@ -1,19 +1,37 @@
 """
 Module for signal processing.
 
+If the optional dependency ``pyfftw`` is installed, it is registered as the
+global ``scipy.fft`` backend: FFTW keeps its plans alive between calls, which
+pays off for the repeated same-length transforms typical of TFM imaging.
+
 """
 
 import cmath
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 import numba
 import numpy as np
-import scipy.fftpack
-from scipy.signal import butter, filtfilt, hilbert
+import scipy.fft
+from scipy.signal import butter, filtfilt, sos2tf, sosfilt, sosfilt_zi, sosfiltfilt
+
+from . import settings as s
+
+try:
+    import pyfftw
+
+    scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60.0)
+except ImportError:
+    pass
 
 __all__ = [
     "Filter",
     "ButterworthBandpass",
     "ComposedFilter",
+    "Envelope",
     "Hilbert",
     "NoFilter",
     "Abs",
@@ -83,7 +101,64 @@ class ComposedFilter(Filter):
         except AttributeError:
             inner_ops = [inner_filters]
 
-        self.ops = outer_ops + inner_ops
+        # NoFilter is the identity: drop it from the chain at build time.
+        self.ops = [
+            op
+            for op in self._fuse_envelopes(outer_ops + inner_ops)
+            if not isinstance(op, NoFilter)
+        ]
+        self._specialized = self._specialize(self.ops)
+
+    @staticmethod
+    def _fuse_envelopes(ops):
+        """
+        Replace each ``Abs`` directly wrapping a ``Hilbert`` with a single
+        ``Envelope``, skipping one dispatch and dropping the complex
+        intermediate as early as possible.
+        """
+        fused = []
+        i = 0
+        while i < len(ops):
+            if i + 1 < len(ops) and type(ops[i]) is Abs and type(ops[i + 1]) is Hilbert:
+                hilbert_op = ops[i + 1]
+                fused.append(
+                    Envelope(
+                        workers=hilbert_op.workers,
+                        pad_to_fast=hilbert_op.pad_to_fast,
+                    )
+                )
+                i += 2
+            else:
+                fused.append(ops[i])
+                i += 1
+        return fused
+
+    @staticmethod
+    def _specialize(ops):
+        """
+        Build a direct call chain for a pipeline made only of the stock
+        filters, binding the __call__ methods (innermost first) at
+        construction time. Returns None when the pipeline contains filter
+        types this module does not know about.
+        """
+        if not all(type(op) in _SPECIALIZABLE_TYPES for op in ops):
+            return None
+        calls = [op.__call__ for op in reversed(ops)]
+        if len(calls) == 1:
+            return calls[0]
+        if len(calls) == 2:
+            f0, f1 = calls
+            return lambda arr: f1(f0(arr))
+        if len(calls) == 3:
+            f0, f1, f2 = calls
+            return lambda arr: f2(f1(f0(arr)))
+
+        def pipeline(arr):
+            for f in calls:
+                arr = f(arr)
+            return arr
+
+        return pipeline
 
     def __len__(self):
         return len(self.ops)
@@ -105,10 +180,16 @@ class ComposedFilter(Filter):
 
         """
         out = arr
+        if not kwargs:
+            # Fast path: no per-op lookup, no exception handling.
+            if self._specialized is not None:
+                return self._specialized(out)
+            for op in reversed(self.ops):
+                out = op(out)
+            return out
         for op in reversed(self.ops):
-            try:
-                op_kwargs = kwargs.pop(op)
-            except KeyError:
+            op_kwargs = kwargs.pop(op, None)
+            if op_kwargs is None:
                 out = op(out)
             else:
                 out = op(out, **op_kwargs)
@@ -120,6 +201,18 @@ class ComposedFilter(Filter):
         return "\n".join([str(op) for op in self.ops])
 
 
+@functools.lru_cache(maxsize=64)
+def _design_butterworth_bandpass(order, wn_min, wn_max):
+    """
+    Design a Butterworth bandpass in SOS form.
+
+    Cached so that rebuilding filters with identical parameters (parameter
+    sweeps, one filter per acquisition) skips the design step. The returned
+    array is shared between instances and must not be mutated.
+    """
+    return butter(order, (wn_min, wn_max), btype="bandpass", output="sos")
+
+
 class ButterworthBandpass(Filter):
     """
     Butterworth bandpass filter.
@@ -133,21 +226,43 @@ class ButterworthBandpass(Filter):
     time : arim.Time
         Time object. This filter can be used only on data sampled consistently with the attribute
     ``time``.
+    n_workers : int or None
+        Number of threads for filtering batched arrays. Use None for one
+        thread per core (``settings.NUMTHREADS``). Default: 1 (serial).
 
     """
 
-    def __init__(self, order, cutoff_min, cutoff_max, time):
+    def __init__(self, order, cutoff_min, cutoff_max, time, n_workers=1):
         nyquist = 0.5 / time.step
         cutoff_min = cutoff_min * 1.0
         cutoff_max = cutoff_max * 1.0
 
-        Wn = np.array([cutoff_min, cutoff_max]) / nyquist
-
         self.order = order
         self.cutoff_min = cutoff_min
         self.cutoff_max = cutoff_max
 
-        self.b, self.a = butter(order, Wn, btype="bandpass")
+        self.n_workers = n_workers
+
+        # Second-order sections: numerically stable at moderate to high
+        # orders, unlike the direct transfer-function form.
+        self.sos = _design_butterworth_bandpass(
+            order, cutoff_min / nyquist, cutoff_max / nyquist
+        )
+        # Edge-padding length used by sosfiltfilt, precomputed once.
+        n_sections = self.sos.shape[0]
+        ntaps = 2 * n_sections + 1
+        ntaps -= min((self.sos[:, 2] == 0).sum(), (self.sos[:, 5] == 0).sum())
+        self._edge = 3 * int(ntaps)
+
+    @property
+    def b(self):
+        """Transfer-function numerator, for backward compatibility."""
+        return sos2tf(self.sos)[0]
+
+    @property
+    def a(self):
+        """Transfer-function denominator, for backward compatibility."""
+        return sos2tf(self.sos)[1]
 
     def __str__(self):
         return "{} [{:.1f}, {:.1f}] MHz order {}".format(
@@ -159,7 +274,7 @@ class ButterworthBandpass(Filter):
 
     def __call__(self, arr, axis=-1, **kwargs):
         """
-        Apply the filter on array with ``scipy.signal.filtfilt`` (zero-phase filtering).
+        Apply the filter on array with ``scipy.signal.sosfiltfilt`` (zero-phase filtering).
 
         Parameters
         ----------
@@ -172,7 +287,84 @@ class ButterworthBandpass(Filter):
         filtered_arr
 
         """
-        return np.ascontiguousarray(filtfilt(self.b, self.a, arr, axis=axis, **kwargs))
+        # Filter along the last axis: moveaxis is a free view (and a no-op for
+        # axis=-1), whereas letting sosfiltfilt transpose internally costs an
+        # extra copy for non-last axes.
+        arr = np.moveaxis(np.asarray(arr), axis, -1)
+        n_workers = self.n_workers if self.n_workers is not None else s.NUMTHREADS
+        if n_workers > 1 and arr.ndim > 1 and arr.size > arr.shape[-1]:
+            out = self._filtfilt_parallel(arr, n_workers, **kwargs)
+        else:
+            out = self._zero_phase_filter(arr, **kwargs)
+        out = np.moveaxis(out, -1, axis)
+        if out.flags.c_contiguous:
+            return out
+        return np.ascontiguousarray(out)
+
+    def _zero_phase_filter(self, arr, **kwargs):
+        """
+        Apply the zero-phase filter along the last axis.
+
+        The input dtype is preserved: float32 input is filtered with float32
+        coefficients instead of being promoted to float64, which halves the
+        memory traffic of this memory-bound step.
+        """
+        if arr.dtype == np.float32:
+            try:
+                sos = self._sos32
+            except AttributeError:
+                sos = self._sos32 = self.sos.astype(np.float32)
+        else:
+            sos = self.sos
+        try:
+            if kwargs or self._edge >= arr.shape[-1]:
+                # Non-default padding, or a signal too short for the manual
+                # path: defer to scipy (including its error message).
+                return sosfiltfilt(sos, arr, axis=-1, **kwargs)
+            return self._sosfiltfilt_cached_zi(sos, arr)
+        except np.linalg.LinAlgError:
+            # Degenerate designs (cutoffs many orders of magnitude below
+            # Nyquist) make the SOS initial-state solve singular; the direct
+            # transfer-function form still goes through.
+            return filtfilt(self.b, self.a, arr, axis=-1, **kwargs)
+
+    def _sosfiltfilt_cached_zi(self, sos, arr):
+        """
+        Equivalent of ``sosfiltfilt(sos, arr, axis=-1)`` with the initial
+        filter state computed once per instance instead of once per call
+        (``sosfilt_zi`` solves a linear system per section).
+        """
+        try:
+            zi = self._zi
+        except AttributeError:
+            zi = self._zi = sosfilt_zi(self.sos)
+        zi = zi.astype(sos.dtype, copy=False)
+        zi = zi.reshape((sos.shape[0],) + (1,) * (arr.ndim - 1) + (2,))
+
+        edge = self._edge
+        pad_width = [(0, 0)] * (arr.ndim - 1) + [(edge, edge)]
+        ext = np.pad(arr, pad_width, mode="reflect", reflect_type="odd")
+        y, _ = sosfilt(sos, ext, axis=-1, zi=zi * ext[..., :1])
+        y, _ = sosfilt(sos, y[..., ::-1], axis=-1, zi=zi * y[..., -1:])
+        return y[..., ::-1][..., edge:-edge]
+
+    def _filtfilt_parallel(self, arr, n_workers, **kwargs):
+        """
+        Filter the rows of ``arr`` (time on the last axis) on a thread pool.
+
+        Each row is an independent 1D filtering problem and sosfiltfilt
+        releases the GIL in its inner loops, so chunks of rows run
+        concurrently.
+        """
+        arr2d = arr.reshape(-1, arr.shape[-1])
+        chunks = np.array_split(arr2d, min(n_workers, arr2d.shape[0]))
+
+        def task(chunk):
+            return self._zero_phase_filter(chunk, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            out2d = np.concatenate(list(executor.map(task, chunks)))
+        return out2d.reshape(arr.shape)
 
     def __repr__(self):
         return f"<{str(self)} at {hex(id(self))}>"
@@ -216,6 +408,7 @@ class Hanning(Filter):
             (r >= (peak_pos_fract - half_width_fract)),
             (r <= peak_pos_fract + half_width_fract),
         )
+        self._window_cache = {}
 
     def __str__(self):
         return "{} [{:.1f}, {:.1f}] MHz order {}".format(
@@ -227,8 +420,7 @@ class Hanning(Filter):
 
     def __call__(self, arr):
         arr = np.asarray(arr)
-        # broadcast window to (1, 1, ..., numsamples)
-        window = np.array(self.filter_window, ndmin=arr.ndim)
+        window = _broadcast_window(self.filter_window, self._window_cache, arr.ndim)
         return np.fft.ifft(np.fft.fft(arr) * window)
 
 
@@ -236,21 +428,100 @@ class Hilbert(Filter):
     """
     Returns the analytical signal, i.e. ``signal + i * hilbert_signal`` where
     ``hilbert_signal`` is the Hilbert transform of ``signal``.
+
+    The precision of the input is preserved: float32 input gives a complex64
+    analytic signal, which halves the memory of the complex intermediate
+    compared to complex128.
+
+    Parameters
+    ----------
+    workers : int or None
+        Number of workers for the FFTs, passed to ``scipy.fft``. Use -1 for
+        all cores. Default: None (single-threaded).
+    pad_to_fast : bool
+        If True, zero-pad the signal to ``scipy.fft.next_fast_len`` before
+        transforming and discard the padded samples afterwards. This avoids
+        slow FFT sizes with large prime factors at the cost of extra memory;
+        the result near the end of the signal differs slightly from the
+        unpadded transform. Default: False.
+
     """
 
+    def __init__(self, workers=None, pad_to_fast=False):
+        self.workers = workers
+        self.pad_to_fast = pad_to_fast
+
     def __call__(self, arr, axis=-1):
-        return hilbert(arr, axis=axis)
+        arr = np.asarray(arr)
+        if np.iscomplexobj(arr):
+            raise ValueError("arr must be real.")
+        # Forward transform of a real signal: rfft computes only the positive
+        # half of the spectrum, which is all rfft_to_hilbert needs. This halves
+        # the forward FFT cost compared to scipy.signal.hilbert.
+        n = arr.shape[axis]
+        if self.pad_to_fast:
+            n_fft = scipy.fft.next_fast_len(n, real=True)
+        else:
+            n_fft = n
+        xf = scipy.fft.rfft(arr, n=n_fft, axis=axis, workers=self.workers)
+        analytic = rfft_to_hilbert(xf, n_fft, axis=axis, workers=self.workers)
+        if n_fft != n:
+            analytic = np.moveaxis(np.moveaxis(analytic, axis, -1)[..., :n], -1, axis)
+        return analytic
 
     def __str__(self):
         return "Hilbert transform"
 
 
+@numba.vectorize(
+    ["float32(complex64)", "float64(complex128)"],
+    nopython=True,
+    target="parallel",
+)
+def _abs_complex(x):
+    return abs(x)
+
+
+class Envelope(Filter):
+    """
+    Returns the envelope of a real signal, i.e. the modulus of its analytic
+    signal.
+
+    Equivalent to ``Abs() + Hilbert()``, but the complex analytic signal is
+    consumed by the modulus kernel immediately and freed before returning,
+    instead of crossing a filter boundary.
+
+    Parameters
+    ----------
+    workers : int or None
+        See :class:`Hilbert`.
+    pad_to_fast : bool
+        See :class:`Hilbert`.
+
+    """
+
+    def __init__(self, workers=None, pad_to_fast=False):
+        self._hilbert = Hilbert(workers=workers, pad_to_fast=pad_to_fast)
+
+    def __call__(self, arr, axis=-1):
+        analytic = self._hilbert(arr, axis=axis)
+        return _abs_complex(analytic)
+
+    def __str__(self):
+        return "Envelope"
+
+
 class Abs(Filter):
     """
     Returns the absolute value of a signal.
     """
 
     def __call__(self, arr):
+        arr = np.asarray(arr)
+        if arr.dtype.kind == "c":
+            # Complex modulus is memory-bound (two floats read per element);
+            # the parallel numba ufunc uses all cores.
+            return _abs_complex(arr)
         return np.abs(arr)
 
     def __str__(self):
@@ -297,6 +568,7 @@ class Gaussian(Filter):
         self.filter_window = np.exp(-np.power(r / r1, 2))
         if force_zero:
             self.filter_window[self.filter_window < fract] = 0
+        self._window_cache = {}
 
     def __str__(self):
         return "{} [{:.1f}, {:.1f}] MHz order {}".format(
@@ -308,12 +580,89 @@ class Gaussian(Filter):
 
     def __call__(self, arr):
         arr = np.asarray(arr)
-        # broadcast window to (1, 1, ..., numsamples)
-        window = np.array(self.filter_window, ndmin=arr.ndim)
+        window = _broadcast_window(self.filter_window, self._window_cache, arr.ndim)
         return np.fft.ifft(np.fft.fft(arr) * window)
 
 
-def rfft_to_hilbert(xf, n, axis=-1):
+# Stock filters whose __call__ is safe to chain directly without kwargs;
+# ComposedFilter builds a specialized pipeline when it only contains these.
+_SPECIALIZABLE_TYPES = (
+    Abs,
+    ButterworthBandpass,
+    Envelope,
+    Gaussian,
+    Hanning,
+    Hilbert,
+)
+
+
+def _broadcast_window(window, cache, ndim):
+    """
+    Return ``window`` reshaped to ``(1, 1, ..., numsamples)``, cached by
+    ``ndim``.
+
+    The reshape is a view of the stored window, so repeated calls with
+    same-rank input (the normal case) allocate nothing, unlike
+    ``np.array(window, ndmin=ndim)`` which copied the window per call.
+    """
+    try:
+        return cache[ndim]
+    except KeyError:
+        out = window.reshape((1,) * (ndim - 1) + window.shape)
+        cache[ndim] = out
+        return out
+
+
+@numba.jit(nopython=True, nogil=True, parallel=True, cache=True)
+def _copy_scaled_spectrum(xf, scale_stop, zero_start, out):
+    """
+    Write the analytic-signal scaling of ``xf`` into ``out``, fused with the
+    copy: bin 0 keeps its weight (as does the Nyquist bin, which falls in
+    ``scale_stop:zero_start`` for even signal lengths), bins
+    ``1:scale_stop`` are doubled and bins ``zero_start:`` are zeroed.
+
+    Parameters
+    ----------
+    xf, out
+        Shape: (m, numfreq)
+    scale_stop, zero_start : int
+
+    """
+    m, numfreq = xf.shape
+    for i in numba.prange(m):
+        out[i, 0] = xf[i, 0]
+        for j in range(1, scale_stop):
+            out[i, j] = 2 * xf[i, j]
+        for j in range(scale_stop, zero_start):
+            out[i, j] = xf[i, j]
+        for j in range(zero_start, numfreq):
+            out[i, j] = 0
+
+
+def _rfft_to_hilbert_fast(xf, n, workers):
+    """
+    Fast path of :func:`rfft_to_hilbert` for C-contiguous input with the
+    frequency bins on the last axis: straight to the scaling kernel and the
+    inverse FFT, with no axis juggling or view creation.
+    """
+    if n % 2 == 0:
+        scale_stop, zero_start = n // 2, n // 2 + 1
+    else:
+        scale_stop = zero_start = (n + 1) // 2
+    numfreq = xf.shape[-1]
+    out = np.empty_like(xf)
+    _copy_scaled_spectrum(
+        xf.reshape(-1, numfreq),
+        min(scale_stop, numfreq),
+        min(zero_start, numfreq),
+        out.reshape(-1, numfreq),
+    )
+    # out is a temporary owned by this function: let pocketfft destroy it
+    # instead of copying its input.
+    return scipy.fft.ifft(out, n, axis=-1, overwrite_x=True, workers=workers)
+
+
+def rfft_to_hilbert(xf, n, axis=-1, workers=None):
     """
     Convert the Fourier transform of a real signal to the analytic signal.
 
@@ -336,29 +685,38 @@ def rfft_to_hilbert(xf, n, axis=-1):
         Length of the time domain signal
     axis : int
         Default: -1
+    workers : int or None
+        Number of workers for the inverse FFT, passed to ``scipy.fft.ifft``.
+        Default: None (single-threaded).
 
     Returns
     -------
     out : complex ndarray
+        Same precision as ``xf``: complex64 input (the rfft of a float32
+        signal) gives complex64 output.
 
     """
     # cf code of https://docs.scipy.org/doc/scipy/reference/generated/scipy.signal.hilbert.html
     if xf.ndim == 0:
-        h = 1.0
+        return scipy.fft.ifft(xf, n, axis=axis, workers=workers)
+
+    if (axis == -1 or axis == xf.ndim - 1) and xf.flags.c_contiguous:
+        return _rfft_to_hilbert_fast(xf, n, workers)
+
+    # General path. Scale a copy of the spectrum instead of building a
+    # broadcast mask and multiplying: the DC (and Nyquist, for even n) bins
+    # keep their weight of 1, the other positive-frequency bins are doubled
+    # and any bin beyond the one-sided spectrum is zeroed.
+    if n % 2 == 0:
+        scale_stop, zero_start = n // 2, n // 2 + 1
     else:
-        h = np.zeros(xf.shape[axis])
-        if n % 2 == 0:
-            h[0] = h[n // 2] = 1
-            h[1 : n // 2] = 2
-        else:
-            h[0] = 1
-            h[1 : (n + 1) // 2] = 2
-
-    if xf.ndim > 1:
-        ind = [np.newaxis] * xf.ndim
-        ind[axis] = slice(None)
-        h = h[tuple(ind)]
-    return scipy.fftpack.ifft(h * xf, n, axis)
+        scale_stop = zero_start = (n + 1) // 2
+    xf = xf.copy()
+    xf_end = np.moveaxis(xf, axis, -1)
+    xf_end[..., 1:scale_stop] *= 2
+    xf_end[..., zero_start:] = 0
+    # xf is a local copy: let pocketfft destroy it instead of copying.
+    return scipy.fft.ifft(xf, n, axis=axis, overwrite_x=True, workers=workers)
 
 
 @numba.guvectorize(
@@ -82,6 +82,14 @@ def test_find_minimum_times2():
     assert np.all(best_indices_expected == best_indices)
 
 
+def test_smallest_uint_that_fits():
+    assert ray.smallest_uint_that_fits(2**8 - 1) == np.uint8
+    assert ray.smallest_uint_that_fits(2**8) == np.uint16
+    assert ray.smallest_uint_that_fits(2**16 - 1) == np.uint16
+    assert ray.smallest_uint_that_fits(2**16) == np.uint32
+    assert ray.smallest_uint_that_fits(2**32) == np.uint64
+
+
 def test_fermat_path():
     s1 = ray.FermatPath(("frontwall", 1.234, "backwall"))
     s1_bis = ray.FermatPath(("frontwall", 1.234, "backwall"))
@@ -367,6 +375,9 @@ def test_fermat_solver():
         assert rays_dict[path].indices.shape == (path.num_points_sets, n, m)
         assert rays_dict[path].times.shape == (n, m)
 
+        # Default dtype: smallest unsigned integer that fits all interfaces.
+        assert rays_dict[path].indices.dtype == np.uint8
+
         # Check the first and last points of the rays:
         indices = rays_dict[path].indices
         assert np.all(indices[0, ...] == np.fromfunction(lambda i, j: i, (n, m)))